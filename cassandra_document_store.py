@@ -1,10 +1,16 @@
 import uuid
 import time
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Optional
 
-from cassandra.cluster import Cluster
-from cassandra.policies import DCAwareRoundRobinPolicy
+from cassandra.cluster import Cluster, NoHostAvailable
+from cassandra.concurrent import execute_concurrent
+from cassandra.policies import (
+    DCAwareRoundRobinPolicy,
+    ExponentialReconnectionPolicy,
+    TokenAwarePolicy
+)
 from haystack import Document
+from haystack.document_stores.errors import DocumentStoreError
 from haystack.document_stores.types import DocumentStore
 
 
@@ -15,15 +21,41 @@ class CassandraDocumentStore(DocumentStore):
         port: int = 9042,
         embedding_dim: int = 1024,
         keyspace: str = "haystack",
-        table: str = "document"
+        table: str = "document",
+        connect_attempts: int = 30,
+        local_dc: str = "",
+        connection_class: Optional[type] = None,
+        track_document_count: bool = False
     ):
-        time.sleep(15)
+        if connect_attempts < 1:
+            raise ValueError(f"connect_attempts must be at least 1, got {connect_attempts}")
 
-        self.cluster = Cluster(host, port=port, load_balancing_policy=DCAwareRoundRobinPolicy())
-        self.session = self.cluster.connect()
+        # None keeps the driver's own reactor choice, which is libev when it was built with it
+        cluster_kwargs = {"connection_class": connection_class} if connection_class else {}
+        # A Cluster shuts itself down when the first connect fails, so retry with a fresh one
+        for attempt in range(connect_attempts):
+            self.cluster = Cluster(
+                host,
+                port=port,
+                protocol_version=5,
+                load_balancing_policy=TokenAwarePolicy(
+                    DCAwareRoundRobinPolicy(local_dc=local_dc),
+                    shuffle_replicas=True
+                ),
+                reconnection_policy=ExponentialReconnectionPolicy(1, 60),
+                **cluster_kwargs
+            )
+            try:
+                self.session = self.cluster.connect()
+                break
+            except NoHostAvailable:
+                if attempt == connect_attempts - 1:
+                    raise
+                time.sleep(1)
 
         self.keyspace = keyspace
         self.table = table
+        self.track_document_count = track_document_count
 
         self.session.execute(f"""
             CREATE KEYSPACE IF NOT EXISTS {self.keyspace}
@@ -48,80 +80,162 @@ class CassandraDocumentStore(DocumentStore):
             WITH OPTIONS = {{'similarity_function': 'cosine'}}
         """)
 
-    def write_documents(self, documents: List[Document]) -> int:
-        count = 0
-        for doc in documents:
-            meta = {k: str(v) for k, v in (doc.meta or {}).items()}
-            self.session.execute(
-                f"""
-                INSERT INTO {self.table} (id, embedding, meta, content)
-                VALUES (%s, %s, %s, %s)
-                """,
-                [doc.id or str(uuid.uuid4()), doc.embedding, meta, doc.content]
+        self._insert_ps = self.session.prepare(f"""
+            INSERT INTO {self.table} (id, embedding, meta, content)
+            VALUES (?, ?, ?, ?)
+        """)
+        self._ann_ps = self.session.prepare(f"""
+            SELECT id, content, meta, embedding, similarity_cosine(embedding, ?) AS score
+            FROM {self.table}
+            ORDER BY embedding ANN OF ?
+            LIMIT ?
+        """)
+        self._ann_no_embedding_ps = self.session.prepare(f"""
+            SELECT id, content, meta, similarity_cosine(embedding, ?) AS score
+            FROM {self.table}
+            ORDER BY embedding ANN OF ?
+            LIMIT ?
+        """)
+        self._select_by_id_ps = self.session.prepare(
+            f"SELECT id, content, meta, embedding FROM {self.table} WHERE id = ?"
+        )
+        self._select_all_ps = self.session.prepare(
+            f"SELECT id, content, meta, embedding FROM {self.table}"
+        )
+        self._exists_by_id_ps = self.session.prepare(
+            f"SELECT id FROM {self.table} WHERE id = ?"
+        )
+        self._delete_by_id_ps = self.session.prepare(
+            f"DELETE FROM {self.table} WHERE id = ?"
+        )
+        self._count_ps = self.session.prepare(f"SELECT COUNT(*) FROM {self.table}")
+
+        if self.track_document_count:
+            self.session.execute("""
+                CREATE TABLE IF NOT EXISTS document_counters (
+                    name text PRIMARY KEY,
+                    cnt counter
+                )
+            """)
+            self._counter_ps = self.session.prepare(
+                "SELECT cnt FROM document_counters WHERE name = ?"
             )
-            count += 1
-        return count
-    
-    def query_by_embedding(self, embedding: List[float], top_k: int = 5) -> List[Document]:
-        rows = self.session.execute(
-            f"""
-            SELECT id, content, meta, embedding FROM {self.table}
-            ORDER BY embedding ANN OF %s
-            LIMIT %s
-            """,
-            [embedding, top_k]
+            self._add_to_counter_ps = self.session.prepare(
+                "UPDATE document_counters SET cnt = cnt + ? WHERE name = ?"
+            )
+
+    @staticmethod
+    def _to_document(row) -> Document:
+        return Document(
+            id=row.id,
+            content=row.content,
+            meta=dict(row.meta) if row.meta else {},
+            embedding=getattr(row, "embedding", None),
+            score=getattr(row, "score", None)
         )
-        return [
-            Document(
-                id=row.id,
-                content=row.content,
-                meta=dict(row.meta) if row.meta else {},
-                embedding=row.embedding
-            ) for row in rows
+
+    @staticmethod
+    def _to_vector(embedding):
+        # numpy arrays go through the driver's per-element float codec as numpy scalars;
+        # tolist() converts them to Python floats in a single C pass
+        if embedding is not None and hasattr(embedding, "tolist"):
+            return embedding.tolist()
+        return embedding
+
+    @staticmethod
+    def _to_meta(meta):
+        # map<text, text> needs string values; skip rebuilding the dict when they already are
+        if not meta:
+            return {}
+        if all(type(v) is str for v in meta.values()):
+            return meta
+        return {k: v if type(v) is str else str(v) for k, v in meta.items()}
+
+    def write_documents(self, documents: List[Document], concurrency: int = 128) -> int:
+        ids = []
+        params = []
+        for doc in documents:
+            doc_id = doc.id or str(uuid.uuid4())
+            ids.append(doc_id)
+            params.append((
+                self._insert_ps,
+                (doc_id, self._to_vector(doc.embedding), self._to_meta(doc.meta), doc.content)
+            ))
+        results = execute_concurrent(
+            self.session, params, concurrency=concurrency, raise_on_first_error=False
+        )
+        failed = [
+            (doc_id, result) for doc_id, (success, result) in zip(ids, results) if not success
         ]
+        count = len(ids) - len(failed)
+        self._add_to_counter(count)
+        if failed:
+            details = ", ".join(f"{doc_id}: {exc!r}" for doc_id, exc in failed[:10])
+            raise DocumentStoreError(
+                f"Failed to write {len(failed)} of {len(ids)} documents ({details})"
+            ) from failed[0][1]
+        return count
+
+    def query_by_embedding(
+        self,
+        embedding: List[float],
+        top_k: int = 5,
+        return_embedding: bool = True
+    ) -> List[Document]:
+        statement = self._ann_ps if return_embedding else self._ann_no_embedding_ps
+        vector = self._to_vector(embedding)
+        rows = self.session.execute(statement, (vector, vector, top_k))
+        return [self._to_document(row) for row in rows]
 
     def get_document_by_id(self, document_id: str) -> Document:
-        row = self.session.execute(
-            f"SELECT id, content, meta, embedding FROM {self.table} WHERE id = %s",
-            [document_id]
-        ).one()
+        row = self.session.execute(self._select_by_id_ps, (document_id,)).one()
         if row:
-            return Document(
-                id=row.id,
-                content=row.content,
-                meta=dict(row.meta) if row.meta else {},
-                embedding=row.embedding
-            )
+            return self._to_document(row)
         return None
     
-    def get_documents_by_id(self, ids: List[str]) -> List[Document]:
-        return [doc for doc in (self.get_document_by_id(doc_id) for doc_id in ids) if doc]
+    def get_documents_by_id(self, ids: List[str], concurrency: int = 256) -> List[Document]:
+        results = execute_concurrent(
+            self.session,
+            ((self._select_by_id_ps, (doc_id,)) for doc_id in ids),
+            concurrency=concurrency
+        )
+        documents = []
+        for _, rows in results:
+            row = rows.one()
+            if row:
+                documents.append(self._to_document(row))
+        return documents
+
+    def iter_all_documents(self, fetch_size: int = 1000) -> Iterator[Document]:
+        statement = self._select_all_ps.bind(())
+        statement.fetch_size = fetch_size
+        for row in self.session.execute(statement):
+            yield self._to_document(row)
 
     def get_all_documents(self) -> List[Document]:
-        rows = self.session.execute(f"SELECT id, content, meta, embedding FROM {self.table}")
-        return [
-            Document(
-                id=row.id,
-                content=row.content,
-                meta=dict(row.meta) if row.meta else {},
-                embedding=row.embedding
-            ) for row in rows
-        ]
-    
-    def delete_documents(self, document_ids: List[str]) -> Dict[str, Any]:
+        return list(self.iter_all_documents())
+
+    def delete_documents(self, document_ids: List[str], concurrency: int = 128) -> Dict[str, Any]:
+        # Plain SELECT then DELETE, both pipelined: IF EXISTS would make every delete a
+        # Paxos transaction against rows that write_documents inserts without one
+        results = execute_concurrent(
+            self.session,
+            ((self._exists_by_id_ps, (doc_id,)) for doc_id in document_ids),
+            concurrency=concurrency
+        )
         deleted_ids = []
         not_found_ids = []
-        for doc_id in document_ids:
-            result = self.session.execute(
-                f"SELECT id FROM {self.table} WHERE id = %s", [doc_id]
-            ).one()
-            if result:
-                self.session.execute(
-                    f"DELETE FROM {self.table} WHERE id = %s", [doc_id]
-                )
+        for doc_id, (_, rows) in zip(document_ids, results):
+            if rows.one():
                 deleted_ids.append(doc_id)
             else:
                 not_found_ids.append(doc_id)
+        execute_concurrent(
+            self.session,
+            ((self._delete_by_id_ps, (doc_id,)) for doc_id in deleted_ids),
+            concurrency=concurrency
+        )
+        self._add_to_counter(-len(deleted_ids))
         return {
             "deleted_count": len(deleted_ids),
             "deleted_ids": deleted_ids,
@@ -130,6 +244,35 @@ class CassandraDocumentStore(DocumentStore):
 
     def delete_all_documents(self) -> None:
         self.session.execute(f"TRUNCATE {self.table}")
+        if self.track_document_count:
+            # Deleted counters cannot be reliably incremented again, so zero it by subtraction
+            self._add_to_counter(-(self._read_counter() or 0))
+
+    def _read_counter(self) -> Optional[int]:
+        row = self.session.execute(self._counter_ps, (self.table,)).one()
+        return row.cnt if row else None
+
+    def _add_to_counter(self, delta: int) -> None:
+        if self.track_document_count and delta:
+            self.session.execute(self._add_to_counter_ps, (delta, self.table))
 
     def count_documents(self) -> int:
-        return self.session.execute(f"SELECT COUNT(*) FROM {self.table}").one()[0]
+        return self.session.execute(self._count_ps).one()[0]
+
+    def estimate_document_count(self) -> int:
+        # Approximate: overwriting an existing id still bumps the counter.
+        # Falls back to the exact scan when tracking is off or has not been seeded yet.
+        if self.track_document_count:
+            count = self._read_counter()
+            if count is not None:
+                return count
+        return self.count_documents()
+
+    def resync_document_count(self) -> int:
+        # Explicit maintenance step: scan the table and reset the counter to the exact value.
+        # Run it from one process at a time, ideally while nothing else is writing.
+        if not self.track_document_count:
+            raise ValueError("resync_document_count requires track_document_count=True")
+        count = self.count_documents()
+        self._add_to_counter(count - (self._read_counter() or 0))
+        return count